@@ -1,30 +1,536 @@
+from asyncio import Queue, ensure_future, gather, new_event_loop, set_event_loop, sleep as sleep_async
+from atexit import register
+from collections import namedtuple
 from datetime import datetime
-from json import loads
+from functools import lru_cache, partial, wraps
+from hashlib import blake2b
+from inspect import iscoroutinefunction, isclass, isfunction
+from json import dumps
 from math import floor
+from mmap import ACCESS_READ, mmap
+from multiprocessing import Process, Queue as ProcessQueue
+from os import devnull, fstat, fsync, getpid, register_at_fork
+from os.path import join
+from platform import python_version
 from pprint import pprint
+from queue import Empty, Full, Queue as ThreadQueue, SimpleQueue
+from random import Random
 from re import compile
-from sys import argv
-from threading import Thread
-from time import time
+from socket import AF_UNIX, SOCK_STREAM, socket
+from struct import Struct
+from sys import argv, intern, stdout
+from threading import Lock, Thread
+from time import perf_counter, sleep, time
 from traceback import print_exc
 
 from pytz import timezone, utc
-from requests import request
+from requests import Session
 from websocket import WebSocketApp
+from websockets import connect, serve
+from websockets.exceptions import ConnectionClosed
+
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
 
 PATTERN = compile(r'document\.ip_list\.create_prebuilt_event\((.*?)\);')
+PREFIX = 'document.ip_list.create_prebuilt_event('
+
+PATTERNS = {
+    'event': compile(r'"event"\s*:\s*"?(\d+)"?'),
+    'fb_result': compile(r'"fb_result"\s*:\s*"([^"]*)"'),
+    'name': compile(r'"name"\s*:\s*("(?:[^"\\]|\\.)*")'),
+    'selection': compile(r'\{[^{}]*"fb_result"[^{}]*\}'),
+    'start_time': compile(r'"start_time"\s*:\s*"([^"]*)"'),
+}
+
+CHUNK_SIZE = 16384
+
+DEBUG = 10
+INFO = 20
+ERROR = 40
+
+LEVELS = {
+    'debug': DEBUG,
+    'info': INFO,
+    'error': ERROR,
+}
+
+HEADER = Struct('<I')
+
+Snapshot = namedtuple(
+    'Snapshot',
+    [
+        'period',
+        'minute',
+        'goals',
+        'yellow_cards',
+        'red_cards',
+        'corners',
+        'shots_on_target',
+        'shots_off_target',
+        'possession',
+    ],
+)
+
+TIMEZONE = timezone('Europe/London')
 
 
 def trace(function):
+    @wraps(function)
     def wrap(*args, **kwargs):
         try:
             return function(*args, **kwargs)
         except Exception:
             print_exc()
             raise
+    wrap.traced = True
     return wrap
 
 
+def trace_all():
+    items = globals()
+    for name, value in list(items.items()):
+        if name == 'trace' or getattr(value, '__module__', None) != __name__:
+            continue
+        if isclass(value):
+            for key, function in list(vars(value).items()):
+                if is_traceable(function):
+                    setattr(value, key, trace(function))
+            continue
+        if is_traceable(value):
+            items[name] = trace(value)
+
+
+def is_traceable(function):
+    if not isfunction(function):
+        return False
+    if iscoroutinefunction(function):
+        return False
+    if getattr(function, 'traced', False):
+        return False
+    return True
+
+
+class Logger():
+
+    BATCH = 256
+
+    def __init__(self, level, stream):
+        self.level = level
+        self.stream = stream
+        self.records = SimpleQueue()
+        self.lock = Lock()
+        self.thread = None
+        self.stopped = False
+
+    def is_enabled(self, level):
+        if self.stopped:
+            return False
+        return level >= self.level
+
+    def log(self, level, prefix, suffix):
+        if not self.is_enabled(level):
+            return
+        self.records.put((prefix, suffix))
+        if not self.thread:
+            self.start()
+
+    def start(self):
+        with self.lock:
+            if self.thread:
+                return
+            self.thread = Thread(target=self.write)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def write(self):
+        try:
+            self.write_records()
+        except Exception:
+            self.stopped = True
+            self.records = SimpleQueue()
+
+    def write_records(self):
+        while True:
+            record = self.records.get()
+            if record is None:
+                return
+            lines = [self.format(*record)]
+            while len(lines) < self.BATCH:
+                try:
+                    record = self.records.get_nowait()
+                except Empty:
+                    break
+                if record is None:
+                    self.stream.write(''.join(lines))
+                    self.stream.flush()
+                    return
+                lines.append(self.format(*record))
+            self.stream.write(''.join(lines))
+            self.stream.flush()
+
+    def format(self, prefix, suffix):
+        if prefix and suffix:
+            prefix = prefix.ljust(28, ' ')
+            suffix = repr(suffix)
+            return '[+] {:s} : {:s}\n'.format(prefix, suffix)
+        return '[+] {:s}\n'.format(prefix)
+
+    def close(self):
+        with self.lock:
+            if not self.thread:
+                return
+            self.records.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def reset(self):
+        self.records = SimpleQueue()
+        self.lock = Lock()
+        self.thread = None
+
+
+LOGGER = Logger(DEBUG, stdout)
+register(LOGGER.close)
+register_at_fork(after_in_child=LOGGER.reset)
+
+
+class Event():
+
+    __slots__ = (
+        'team',
+        'player',
+        'seconds',
+        'coordinates',
+        'description',
+        'type',
+        'percentage',
+        'timestamp',
+    )
+
+    def __init__(self, team, player, seconds, coordinates, description, type, percentage, timestamp):
+        self.team = team
+        self.player = player
+        self.seconds = seconds
+        self.coordinates = coordinates
+        self.description = description
+        self.type = type
+        self.percentage = percentage
+        self.timestamp = timestamp
+
+    def get_key(self):
+        key = (self.team, self.player, self.seconds, self.coordinates, self.description, self.type)
+        key = repr(key)
+        key = key.encode('utf-8')
+        return key
+
+    def to_dict(self):
+        key = 'seconds'
+        if self.description == 'possession':
+            key = 'minute'
+        event = {
+            'team': self.team,
+            'player': self.player,
+            key: self.seconds,
+            'coordinates': self.coordinates,
+            'description': self.description,
+            'type': self.type,
+            'percentage': self.percentage,
+            'timestamp': self.timestamp,
+            '_dispatch_match_event': True,
+        }
+        return event
+
+
+class Events():
+
+    CAPACITY = 10000
+    TTL = 3600
+
+    def __init__(self):
+        self.events = {}
+        self.ids = set()
+        self.pending = {}
+        self.flushed = {}
+        self.counts = {}
+        self.percentages = {}
+
+    def __len__(self):
+        return len(self.events)
+
+    def __contains__(self, id):
+        return id in self.ids
+
+    def add(self, id, event):
+        if id not in self.ids:
+            self.ids.add(id)
+            key = (event.team, event.description)
+            if key not in self.counts:
+                self.counts[key] = 0
+            self.counts[key] = self.counts[key] + 1
+        elif event.percentage is None:
+            return False
+        elif id in self.percentages and self.percentages[id] == event.percentage:
+            return False
+        if event.percentage is not None:
+            self.percentages[id] = event.percentage
+        self.events[id] = event
+        self.pending[id] = event
+        return True
+
+    def count(self, team, description):
+        key = (team, description)
+        if key not in self.counts:
+            return 0
+        return self.counts[key]
+
+    def flush(self):
+        events = list(self.pending.values())
+        timestamp = time()
+        for id in self.pending:
+            if id in self.flushed:
+                del self.flushed[id]
+            self.flushed[id] = timestamp
+        self.pending = {}
+        self.evict()
+        return events
+
+    def evict(self):
+        timestamp = time() - self.TTL
+        while self.flushed:
+            id = next(iter(self.flushed))
+            if len(self.events) <= self.CAPACITY and self.flushed[id] >= timestamp:
+                return
+            del self.flushed[id]
+            del self.events[id]
+
+    def release(self):
+        self.events = {}
+        self.ids = set()
+        self.pending = {}
+        self.flushed = {}
+        self.counts = {}
+        self.percentages = {}
+
+    def items(self):
+        return self.events.items()
+
+    def keys(self):
+        return self.events.keys()
+
+    def values(self):
+        return self.events.values()
+
+
+class EventLog():
+
+    BATCH = 256
+    INTERVAL = 1.0
+
+    def __init__(self, path):
+        self.path = path
+        self.resource = open(path, 'ab')
+        self.count = 0
+        self.timestamp = time()
+
+    def write(self, events):
+        for event in events:
+            data = dumps(event.to_dict(), separators=(',', ':'))
+            data = data.encode('utf-8')
+            self.resource.write(HEADER.pack(len(data)) + data)
+        self.resource.flush()
+        self.count = self.count + len(events)
+        if self.count >= self.BATCH or time() - self.timestamp >= self.INTERVAL:
+            self.sync()
+
+    def sync(self):
+        self.resource.flush()
+        fsync(self.resource.fileno())
+        self.count = 0
+        self.timestamp = time()
+
+    def close(self):
+        self.sync()
+        self.resource.close()
+
+
+class EventLogReader():
+
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        with open(self.path, 'rb') as resource:
+            if not fstat(resource.fileno()).st_size:
+                return
+            with mmap(resource.fileno(), 0, access=ACCESS_READ) as contents:
+                offset = 0
+                size = len(contents)
+                while offset + HEADER.size <= size:
+                    length = HEADER.unpack_from(contents, offset)[0]
+                    offset = offset + HEADER.size
+                    if offset + length > size:
+                        return
+                    yield loads(contents[offset:offset + length])
+                    offset = offset + length
+
+    def query(self, team=None, description=None):
+        events = []
+        for event in self:
+            if team and event['team'] != team:
+                continue
+            if description and event['description'] != description:
+                continue
+            events.append(event)
+        return events
+
+
+class Sink():
+
+    SIZE = 500
+    INTERVAL = 1.0
+    CAPACITY = 10000
+
+    def __init__(self):
+        self.events = ThreadQueue(maxsize=self.CAPACITY)
+        self.dropped = 0
+        self.reported = 0
+        self.thread = Thread(target=self.write)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def put(self, events):
+        for event in events:
+            try:
+                self.events.put_nowait(event)
+            except Full:
+                self.dropped = self.dropped + 1
+
+    def write(self):
+        while True:
+            batch = []
+            deadline = time() + self.INTERVAL
+            while len(batch) < self.SIZE:
+                timeout = deadline - time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = self.events.get(timeout=timeout)
+                except Empty:
+                    break
+                if event is None:
+                    self.publish_batch(batch)
+                    self.report()
+                    return
+                batch.append(event)
+            self.publish_batch(batch)
+            self.report()
+
+    def report(self):
+        dropped = self.dropped
+        if dropped == self.reported:
+            return
+        LOGGER.log(ERROR, 'Sink', 'Dropped {:d} events'.format(dropped - self.reported))
+        self.reported = dropped
+
+    def publish_batch(self, batch):
+        if not batch:
+            return
+        batch = [event.to_dict() for event in batch]
+        try:
+            self.publish(batch)
+        except Exception as error:
+            LOGGER.log(ERROR, 'Sink', error)
+
+    def publish(self, events):
+        raise NotImplementedError
+
+    def close(self):
+        if not self.thread.is_alive():
+            return
+        self.events.put(None)
+        self.thread.join()
+        self.report()
+
+
+class FileSink(Sink):
+
+    def __init__(self, path):
+        self.resource = open(path, 'a')
+        super().__init__()
+
+    def publish(self, events):
+        lines = [dumps(event, separators=(',', ':')) + '\n' for event in events]
+        self.resource.write(''.join(lines))
+        self.resource.flush()
+
+    def close(self):
+        super().close()
+        self.resource.close()
+
+
+class SocketSink(Sink):
+
+    def __init__(self, path):
+        self.path = path
+        self.socket = None
+        super().__init__()
+
+    def publish(self, events):
+        lines = [dumps(event, separators=(',', ':')) + '\n' for event in events]
+        data = ''.join(lines)
+        data = data.encode('utf-8')
+        if not self.socket:
+            self.socket = socket(AF_UNIX, SOCK_STREAM)
+            self.socket.connect(self.path)
+        try:
+            self.socket.sendall(data)
+        except OSError:
+            self.socket.close()
+            self.socket = None
+            raise
+
+    def close(self):
+        super().close()
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+
+
+class CallbackSink(Sink):
+
+    def __init__(self, callback):
+        self.callback = callback
+        super().__init__()
+
+    def publish(self, events):
+        self.callback(events)
+
+
+class Connection():
+
+    def __init__(self, web_socket):
+        self.web_socket = web_socket
+        self.messages = Queue()
+
+    def send(self, message):
+        message = message.decode('utf-8')
+        self.messages.put_nowait(message)
+
+    def close(self):
+        self.messages.put_nowait(None)
+
+    async def write(self):
+        while True:
+            message = await self.messages.get()
+            if message is None:
+                await self.web_socket.close()
+                return
+            await self.web_socket.send(message)
+
+
 class WebSockets():
 
     URL = 'wss://scoreboards-ssl.williamhill.com/diffusion?v=4&ty=WB'
@@ -32,13 +538,36 @@ class WebSockets():
     DELIMITERS_MESSAGE = '\x00'
     DELIMITERS_RECORD = '\x01'
     DELIMITERS_FIELD = '\x02'
+    DELIMITERS_TOPIC = ','
 
     TYPES_CLIENT_ID = '4'
     TYPES_TOPIC_LOAD_MESSAGE = '\x14'
     TYPES_DELTA_MESSAGE = '\x15'
     TYPES_SUBSCRIBE = '\x16'
+    TYPES_UNSUBSCRIBE = '\x17'
     TYPES_PING_CLIENT = '\x19'
 
+    STORE = Events
+
+    DIRECTORY = None
+    SINK = None
+    CAPTURE = None
+
+    DECODER = 'fast'
+    DECODERS = {
+        'fast': 'decode_fast',
+        'legacy': 'decode',
+    }
+
+    SNAPSHOTS = {
+        'goal': 'goals',
+        'yellowCard': 'yellow_cards',
+        'redCard': 'red_cards',
+        'corner': 'corners',
+        'shotongoal': 'shots_on_target',
+        'shotoffgoal': 'shots_off_target',
+    }
+
     TOPICS = [
         'sportsbook/football/{id:d}/i18n/en-gb/commentary',
         'sportsbook/football/{id:d}/stats/away/cards/red',
@@ -68,16 +597,86 @@ class WebSockets():
         'sportsbook/football/{id:d}/stats/time',
     ]
 
-    @trace
+    SELECTORS = [
+        'sportsbook/football/{id:d}/i18n/en-gb/commentary',
+        'sportsbook/football/{id:d}/stats//',
+    ]
+
+    COORDINATES_OPTIONAL = 'optional'
+    COORDINATES_REQUIRED = 'required'
+    COORDINATES_FREE_KICK = 'free kick'
+
+    COMMENTARIES = {
+        'AWAY_ATTACK': ('away', 'attack', None, None, COORDINATES_OPTIONAL),
+        'AWAY_DANGER': ('away', 'danger', None, None, COORDINATES_OPTIONAL),
+        'AWAY_SAFE': ('away', 'safe', None, None, COORDINATES_OPTIONAL),
+        'BALL_SAFE': (None, None, None, None, COORDINATES_REQUIRED),
+        'CORNER_AWAY': ('away', 'corner', None, None, COORDINATES_OPTIONAL),
+        'CORNER_HOME': ('home', 'corner', None, None, COORDINATES_OPTIONAL),
+        'FREE_KICK_AWAY': ('away', ('dfreekick', 'sfreekick'), None, None, COORDINATES_FREE_KICK),
+        'FREE_KICK_HOME': ('home', ('sfreekick', 'dfreekick'), None, None, COORDINATES_FREE_KICK),
+        'GOAL_KICK_AWAY': ('away', 'goalkick', None, None, COORDINATES_OPTIONAL),
+        'GOAL_KICK_HOME': ('home', 'goalkick', None, None, COORDINATES_OPTIONAL),
+        'HALF_TIME': (None, 'halftime', None, None, COORDINATES_OPTIONAL),
+        'HOME_ATTACK': ('home', 'attack', None, None, COORDINATES_OPTIONAL),
+        'HOME_DANGER': ('home', 'danger', None, None, COORDINATES_OPTIONAL),
+        'HOME_SAFE': ('home', 'safe', None, None, COORDINATES_OPTIONAL),
+        'KICK_OFF_AWAY': ('away', 'kickoff', None, None, COORDINATES_OPTIONAL),
+        'KICK_OFF_HOME': ('home', 'kickoff', None, None, COORDINATES_OPTIONAL),
+        'PENALTY_MISSED_AWAY': ('away', 'penaltyMiss', None, None, COORDINATES_OPTIONAL),
+        'PENALTY_MISSED_HOME': ('home', 'penaltyMiss', None, None, COORDINATES_OPTIONAL),
+        'SECOND_HALF': (None, 'secondhalf', None, None, COORDINATES_OPTIONAL),
+        'SUBSTITUTION_AWAY': ('away', 'substitution', None, None, COORDINATES_OPTIONAL),
+        'SUBSTITUTION_HOME': ('home', 'substitution', None, None, COORDINATES_OPTIONAL),
+        'THROW_IN_AWAY': ('away', 'throw', None, None, COORDINATES_OPTIONAL),
+        'THROW_IN_HOME': ('home', 'throw', None, None, COORDINATES_OPTIONAL),
+    }
+
+    HANDLERS = {
+        '/i18n/en-gb/commentary': ('process_commentary', COMMENTARIES),
+        '/stats/away/cards/red': ('process_stats', ('away', 'redCard', None, 2, None)),
+        '/stats/away/cards/yellow': ('process_stats', ('away', 'yellowCard', None, 2, None)),
+        '/stats/away/corners': ('process_stats', ('away', 'corner', None, None, None)),
+        '/stats/away/freeKicks': ('process_stats', ('away', 'dfreekick', None, None, None)),
+        '/stats/away/goals': ('process_stats', ('away', 'goal', 'G', 2, None)),
+        '/stats/away/penalties': ('process_stats', ('away', 'penalty', 'P', 2, None)),
+        '/stats/away/shots/offTarget': ('process_stats', ('away', 'shotoffgoal', None, None, None)),
+        '/stats/away/shots/onTarget': ('process_stats', ('away', 'shotongoal', None, None, None)),
+        '/stats/away/shots/onWoodwork': ('process_stats', ('away', 'shotongoal', None, None, None)),
+        '/stats/away/substitutions': ('process_stats', ('away', 'substitution', None, None, None)),
+        '/stats/away/throwIns': ('process_stats', ('away', 'throw', None, None, None)),
+        '/stats/home/cards/red': ('process_stats', ('home', 'redCard', None, 2, None)),
+        '/stats/home/cards/yellow': ('process_stats', ('home', 'yellowCard', None, 2, None)),
+        '/stats/home/corners': ('process_stats', ('home', 'corner', None, None, None)),
+        '/stats/home/freeKicks': ('process_stats', ('home', 'dfreekick', None, None, None)),
+        '/stats/home/goals': ('process_stats', ('home', 'goal', 'G', 2, None)),
+        '/stats/home/penalties': ('process_stats', ('home', 'penalty', 'P', 2, None)),
+        '/stats/home/shots/offTarget': ('process_stats', ('home', 'shotoffgoal', None, None, None)),
+        '/stats/home/shots/onTarget': ('process_stats', ('home', 'shotongoal', None, None, None)),
+        '/stats/home/shots/onWoodwork': ('process_stats', ('home', 'shotongoal', None, None, None)),
+        '/stats/home/substitutions': ('process_stats', ('home', 'substitution', None, None, None)),
+        '/stats/home/throwIns': ('process_stats', ('home', 'throw', None, None, None)),
+        '/stats/homeTeamPossesion': ('process_possession', None),
+        '/stats/period': ('process_period', None),
+        '/stats/time': ('process_time', None),
+    }
+
     def __init__(self, id):
         self.id = id
         self.client_id = None
         self.topics = {}
+        self.handlers = {}
+        self.subscriptions = {}
         self.status = {
             'period': None,
             'minute': 0,
         }
-        self.events = {}
+        self.snapshot = Snapshot(None, 0, (0, 0), (0, 0), (0, 0), (0, 0), (0, 0), (0, 0), (None, None))
+        self.events = self.STORE()
+        self.items = {}
+        self.event_log = None
+        self.capture = None
+        self.decoder = getattr(self, self.DECODERS[self.DECODER])
 
     @trace
     def open(self):
@@ -90,6 +689,47 @@ class WebSockets():
         )
         self.connection.run_forever()
 
+    def close(self):
+        self.connection.close()
+        self.close_event_log()
+        self.close_capture()
+
+    def close_event_log(self):
+        if not self.event_log:
+            return
+        self.event_log.close()
+        self.event_log = None
+
+    def close_capture(self):
+        if not self.capture:
+            return
+        self.capture.close()
+        self.capture = None
+
+    async def open_async(self):
+        try:
+            web_socket = await connect(self.URL)
+        except Exception as error:
+            self.on_error(None, error)
+            return
+        self.connection = Connection(web_socket)
+        writer = ensure_future(self.connection.write())
+        self.on_open(web_socket)
+        try:
+            while True:
+                message = await web_socket.recv()
+                try:
+                    self.on_message(web_socket, message)
+                except Exception as error:
+                    self.on_error(web_socket, error)
+        except ConnectionClosed:
+            pass
+        except Exception as error:
+            self.on_error(web_socket, error)
+        finally:
+            writer.cancel()
+            self.on_close(web_socket)
+
     @trace
     def on_open(self, _):
         self.log('Open', None)
@@ -100,11 +740,11 @@ class WebSockets():
 
     @trace
     def on_message(self, _, message):
-        message = bytearray(message, 'utf-8')
+        if self.CAPTURE:
+            self.get_capture().write(dumps([time(), message]) + '\n')
         type = message[0]
-        type = chr(type)
         payload = message[1:]
-        payload = self.decode(payload)
+        payload = self.decoder(payload)
         if type == self.TYPES_CLIENT_ID:
             self.process_client_id(payload)
             return
@@ -120,37 +760,37 @@ class WebSockets():
 
     @trace
     def on_error(self, _, error):
-        self.log('Error', error)
+        self.log('Error', error, level=ERROR)
 
-    @trace
     def process_client_id(self, payload):
         client_id = payload[0][1]
         self.client_id = client_id
         self.log('Client ID', self.client_id)
-        for topic in self.TOPICS:
-            message = topic
-            message = message.format(id=self.id)
-            type = self.TYPES_SUBSCRIBE
-            headers = [message]
-            data = None
-            self.send(type, headers, data)
+        self.subscribe()
 
-    @trace
     def process_topic_load_message(self, payload):
-        payload[0][0] = payload[0][0].split('!')
-        self.topics[payload[0][0][1]] = payload[0][0][0]
-        payload[0][0] = payload[0][0][0]
-        self.process_payload(payload)
+        if self.status['period'] == 'ended':
+            return
+        topic, alias = payload[0][0].split('!')[:2]
+        self.topics[alias] = topic
+        self.handlers[alias] = self.get_handler(topic)
+        payload[0][0] = topic
+        handler = self.handlers[alias]
+        if not handler:
+            return
+        handler(payload)
+        self.flush()
 
-    @trace
     def process_delta_message(self, payload):
-        payload[0][0] = payload[0][0][1:]
-        payload[0][0] = self.get_topic(payload[0][0])
-        if not payload[0][0]:
+        alias = payload[0][0][1:]
+        if alias not in self.handlers:
             return
-        self.process_payload(payload)
+        handler = self.handlers[alias]
+        if not handler:
+            return
+        handler(payload)
+        self.flush()
 
-    @trace
     def process_ping_client(self, payload):
         timestamp = payload[0][0]
         type = self.TYPES_PING_CLIENT
@@ -158,969 +798,89 @@ class WebSockets():
         data = None
         self.send(type, headers, data)
 
-    @trace
-    def process_payload(self, payload):
-        if payload[0][0].endswith('/i18n/en-gb/commentary'):
-            for item in payload[1:]:
-                if len(item) != 6:
-                    continue
-                if item[4] == 'AWAY_ATTACK':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'attack',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'AWAY_DANGER':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'danger',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'AWAY_SAFE':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'safe',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'BALL_SAFE':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    if not coordinates:
-                        continue
-                    event = {
-                        'team': None,
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': None,
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'CORNER_AWAY':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'corner',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'CORNER_HOME':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'corner',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'FIRST_HALF':
-                    continue
-                if item[4] == 'FREE_KICK_AWAY':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    if not coordinates:
-                        continue
-                    if coordinates[1] < 0.5:
-                        description = 'dfreekick'
-                    else:
-                        description = 'sfreekick'
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': description,
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'FREE_KICK_HOME':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    if not coordinates:
-                        continue
-                    if coordinates[1] < 0.5:
-                        description = 'sfreekick'
-                    else:
-                        description = 'dfreekick'
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': description,
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'FREE_TEXT':
-                    continue
-                if item[4] == 'GAME_STARTING_SOON':
-                    continue
-                if item[4] == 'GOAL_AWAY':
-                    continue
-                if item[4] == 'GOAL_HOME':
-                    continue
-                if item[4] == 'GOAL_KICK_AWAY':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'goalkick',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'GOAL_KICK_HOME':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'goalkick',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'HALF_TIME':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': None,
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'halftime',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'HOME_ATTACK':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'attack',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'HOME_DANGER':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'danger',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'HOME_SAFE':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'safe',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'KICK_OFF_AWAY':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'kickoff',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'KICK_OFF_HOME':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'kickoff',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'LINE_UP':
-                    continue
-                if item[4] == 'PENALTY_AWAY':
-                    continue
-                if item[4] == 'PENALTY_HOME':
-                    continue
-                if item[4] == 'PENALTY_MISSED_AWAY':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'penaltyMiss',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'PENALTY_MISSED_HOME':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'penaltyMiss',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'RED_CARD_AWAY':
-                    continue
-                if item[4] == 'RED_CARD_HOME':
-                    continue
-                if item[4] == 'SECOND_HALF':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': None,
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'secondhalf',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'SHOT_BLOCKED_AWAY':
-                    continue
-                if item[4] == 'SHOT_BLOCKED_HOME':
-                    continue
-                if item[4] == 'SHOT_OFF_TARGET_AWAY':
-                    continue
-                if item[4] == 'SHOT_OFF_TARGET_HOME':
-                    continue
-                if item[4] == 'SHOT_ON_TARGET_AWAY':
-                    continue
-                if item[4] == 'SHOT_ON_TARGET_HOME':
-                    continue
-                if item[4] == 'SHOT_ON_WOODWORK_AWAY':
-                    continue
-                if item[4] == 'SHOT_ON_WOODWORK_HOME':
-                    continue
-                if item[4] == 'SUBSTITUTION_AWAY':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'substitution',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'SUBSTITUTION_HOME':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'substitution',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'THROW_IN_AWAY':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'away',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'throw',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'THROW_IN_HOME':
-                    seconds = item[3]
-                    coordinates = self.get_coordinates(item[5])
-                    event = {
-                        'team': 'home',
-                        'player': None,
-                        'seconds': seconds,
-                        'coordinates': coordinates,
-                        'description': 'throw',
-                        'type': None,
-                        'percentage': None,
-                        'timestamp': self.get_timestamp(),
-                        '_dispatch_match_event': True,
-                    }
-                    id = self.get_id(event)
-                    self.events[id] = event
-                    self.log('/i18n/en-gb/commentary', [event['team'], event['seconds'], event['description']])
-                    continue
-                if item[4] == 'YELLOW_CARD_AWAY':
-                    continue
-                if item[4] == 'YELLOW_CARD_HOME':
-                    continue
-            return
-        if payload[0][0].endswith('/stats/away/cards/red'):
-            for item in payload[1:]:
-                player = None
-                if len(item) >= 3:
-                    player = item[2]
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': player,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'redCard',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'redCard')
-            self.log('/stats/away/cards/red', count)
-            return
-        if payload[0][0].endswith('/stats/away/cards/yellow'):
-            for item in payload[1:]:
-                player = None
-                if len(item) >= 3:
-                    player = item[2]
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': player,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'yellowCard',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'yellowCard')
-            self.log('/stats/away/cards/yellow', count)
-            return
-        if payload[0][0].endswith('/stats/away/corners'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'corner',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'corner')
-            self.log('/stats/away/corners', count)
-            return
-        if payload[0][0].endswith('/stats/away/freeKicks'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'dfreekick',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'dfreekick')
-            self.log('/stats/away/freeKicks', count)
-            return
-        if payload[0][0].endswith('/stats/away/goals'):
-            for item in payload[1:]:
-                player = None
-                if len(item) >= 3:
-                    player = item[2]
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': player,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'goal',
-                    'type': 'G',
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'goal')
-            self.log('/stats/away/goals', count)
-            return
-        if payload[0][0].endswith('/stats/away/penalties'):
-            for item in payload[1:]:
-                player = None
-                if len(item) >= 3:
-                    player = item[2]
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': player,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'penalty',
-                    'type': 'P',
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'penalty')
-            self.log('/stats/away/penalties', count)
-            return
-        if payload[0][0].endswith('/stats/away/shots/offTarget'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'shotoffgoal',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'shotoffgoal')
-            self.log('/stats/away/shots/offTarget', count)
-            return
-        if payload[0][0].endswith('/stats/away/shots/onTarget'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'shotongoal',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'shotongoal')
-            self.log('/stats/away/shots/onTarget', count)
-            return
-        if payload[0][0].endswith('/stats/away/shots/onWoodwork'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'shotongoal',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'shotongoal')
-            self.log('/stats/away/shots/onWoodwork', count)
-            return
-        if payload[0][0].endswith('/stats/away/substitutions'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'substitution',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'substitution')
-            self.log('/stats/away/substitutions', count)
-            return
-        if payload[0][0].endswith('/stats/away/throwIns'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'away',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'throw',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('away', 'throw')
-            self.log('/stats/away/throwIns', count)
-            return
-        if payload[0][0].endswith('/stats/home/cards/red'):
-            for item in payload[1:]:
-                player = None
-                if len(item) >= 3:
-                    player = item[2]
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': player,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'redCard',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'redCard')
-            self.log('/stats/home/cards/red', count)
-            return
-        if payload[0][0].endswith('/stats/home/cards/yellow'):
-            for item in payload[1:]:
-                player = None
-                if len(item) >= 3:
-                    player = item[2]
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': player,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'yellowCard',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'yellowCard')
-            self.log('/stats/home/cards/yellow', count)
-            return
-        if payload[0][0].endswith('/stats/home/corners'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'corner',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'corner')
-            self.log('/stats/home/corners', count)
-            return
-        if payload[0][0].endswith('/stats/home/freeKicks'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'dfreekick',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'dfreekick')
-            self.log('/stats/home/freeKicks', count)
-            return
-        if payload[0][0].endswith('/stats/home/goals'):
-            for item in payload[1:]:
-                player = None
-                if len(item) >= 3:
-                    player = item[2]
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': player,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'goal',
-                    'type': 'G',
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'goal')
-            self.log('/stats/home/goals', count)
-            return
-        if payload[0][0].endswith('/stats/home/penalties'):
-            for item in payload[1:]:
-                player = None
-                if len(item) >= 3:
-                    player = item[2]
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': player,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'penalty',
-                    'type': 'P',
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'penalty')
-            self.log('/stats/home/penalties', count)
-            return
-        if payload[0][0].endswith('/stats/home/shots/offTarget'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'shotoffgoal',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'shotoffgoal')
-            self.log('/stats/home/shots/offTarget', count)
-            return
-        if payload[0][0].endswith('/stats/home/shots/onTarget'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'shotongoal',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'shotongoal')
-            self.log('/stats/home/shots/onTarget', count)
-            return
-        if payload[0][0].endswith('/stats/home/shots/onWoodwork'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'shotongoal',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'shotongoal')
-            self.log('/stats/home/shots/onWoodwork', count)
-            return
-        if payload[0][0].endswith('/stats/home/substitutions'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'substitution',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'substitution')
-            self.log('/stats/home/substitutions', count)
-            return
-        if payload[0][0].endswith('/stats/home/throwIns'):
-            for item in payload[1:]:
-                seconds = item[1]
-                event = {
-                    'team': 'home',
-                    'player': None,
-                    'seconds': seconds,
-                    'coordinates': None,
-                    'description': 'throw',
-                    'type': None,
-                    'percentage': None,
-                    'timestamp': self.get_timestamp(),
-                    '_dispatch_match_event': True,
-                }
-                id = self.get_id(event)
-                self.events[id] = event
-            count = self.get_count('home', 'throw')
-            self.log('/stats/home/throwIns', count)
-            return
-        if payload[0][0].endswith('/stats/homeTeamPossesion'):
-            possession = payload[1][0]
-            home, away = self.get_possession(possession)
-            event = {
-                'team': 'home',
-                'player': None,
-                'minute': None,
-                'coordinates': None,
-                'description': 'possession',
-                'type': None,
-                'percentage': home,
-                'timestamp': self.get_timestamp(),
-                '_dispatch_match_event': True,
-            }
-            id = self.get_id(event)
-            self.events[id] = event
-            event = {
-                'team': 'away',
-                'player': None,
-                'minute': None,
-                'coordinates': None,
-                'description': 'possession',
-                'type': None,
-                'percentage': away,
-                'timestamp': self.get_timestamp(),
-                '_dispatch_match_event': True,
-            }
-            id = self.get_id(event)
-            self.events[id] = event
-            self.log('/stats/homeTeamPossesion', [home, away])
-            return
-        if payload[0][0].endswith('/stats/period'):
-            period = payload[1][0]
-            period = self.get_status_period(period)
-            self.status['period'] = period
-            self.log('/stats/period', self.status)
+    def subscribe(self):
+        message = self.get_subscription(self.TYPES_SUBSCRIBE)
+        self.connection.send(message)
+
+    def unsubscribe(self):
+        message = self.get_subscription(self.TYPES_UNSUBSCRIBE)
+        self.connection.send(message)
+
+    def process_commentary(self, suffix, specs, payload):
+        for item in payload[1:]:
+            if len(item) != 6:
+                continue
+            if item[4] not in specs:
+                continue
+            team, description, type, column, rule = specs[item[4]]
+            seconds = item[3]
+            coordinates = self.get_coordinates(item[5])
+            if rule != self.COORDINATES_OPTIONAL and not coordinates:
+                continue
+            if rule == self.COORDINATES_FREE_KICK:
+                if coordinates[1] < 0.5:
+                    description = description[0]
+                else:
+                    description = description[1]
+            event = self.get_event(team, None, seconds, coordinates, description, type)
+            if not self.add_event(event):
+                continue
+            if LOGGER.is_enabled(DEBUG):
+                self.log(suffix, [event.team, event.seconds, event.description], level=DEBUG)
+
+    def process_stats(self, suffix, spec, payload):
+        team, description, type, column, rule = spec
+        added = 0
+        for item in self.get_items_new(suffix, payload[1:]):
+            player = None
+            if column and len(item) > column:
+                player = item[column]
+            seconds = item[1]
+            event = self.get_event(team, player, seconds, None, description, type)
+            if self.add_event(event):
+                added = added + 1
+        if not added:
             return
-        if payload[0][0].endswith('/stats/time'):
-            minute = payload[1][0]
-            minute = self.get_minute(minute)
-            self.status['minute'] = minute
-            self.log('/stats/time', self.status)
+        self.update_snapshot(team, description, added)
+        if LOGGER.is_enabled(INFO):
+            self.log(suffix, self.get_count(team, description))
+
+    def process_possession(self, suffix, spec, payload):
+        possession = payload[1][0]
+        home, away = self.get_possession(possession)
+        event = self.get_event('home', None, None, None, 'possession', None, home)
+        added = self.add_event(event)
+        event = self.get_event('away', None, None, None, 'possession', None, away)
+        added = self.add_event(event) or added
+        self.snapshot = self.snapshot._replace(possession=(home, away))
+        if not added:
             return
+        if LOGGER.is_enabled(INFO):
+            self.log(suffix, [home, away])
+
+    def process_period(self, suffix, spec, payload):
+        period = payload[1][0]
+        period = self.get_status_period(period)
+        self.status['period'] = period
+        self.snapshot = self.snapshot._replace(period=period)
+        if LOGGER.is_enabled(INFO):
+            self.log(suffix, dict(self.status))
+        if period == 'ended':
+            self.handlers = {}
+            self.events.release()
+            self.items = {}
+            self.close_event_log()
+
+    def process_time(self, suffix, spec, payload):
+        minute = payload[1][0]
+        minute = self.get_minute(minute)
+        self.status['minute'] = minute
+        self.snapshot = self.snapshot._replace(minute=minute)
+        if LOGGER.is_enabled(INFO):
+            self.log(suffix, dict(self.status))
 
-    @trace
     def decode(self, payload):
+        payload = bytearray(payload, 'utf-8')
         payload = payload.split(bytes(self.DELIMITERS_RECORD, 'utf-8'))
         payload = map(lambda item: item.split(bytes(self.DELIMITERS_FIELD, 'utf-8')), payload)
         payload = [map(lambda item: item.decode('utf-8'), p) for p in payload]
@@ -1130,18 +890,19 @@ class WebSockets():
         payload = list(payload)
         return payload
 
-    @trace
-    def log(self, prefix, suffix):
-        if prefix and suffix:
-            prefix = prefix.ljust(28, ' ')
-            suffix = repr(suffix)
-            print('[+]', prefix, ':', suffix)
-            return
-        if prefix:
-            print('[+]', prefix)
+    def decode_fast(self, payload):
+        records = []
+        for record in payload.split(self.DELIMITERS_RECORD):
+            fields = [field for field in record.split(self.DELIMITERS_FIELD) if field]
+            if fields:
+                records.append(fields)
+        return records
+
+    def log(self, prefix, suffix, level=INFO):
+        if not prefix:
             return
+        LOGGER.log(level, prefix, suffix)
 
-    @trace
     def send(self, type, headers, data):
         headers = self.get_headers(headers)
         message = []
@@ -1153,22 +914,90 @@ class WebSockets():
         message = bytearray(message, 'utf-8')
         self.connection.send(message)
 
-    @trace
+    def flush(self):
+        events = self.events.flush()
+        if events and self.DIRECTORY:
+            self.get_event_log().write(events)
+        if events and self.SINK:
+            self.SINK.put(events)
+        return events
+
+    def add_event(self, event):
+        id = self.get_id(event)
+        added = self.events.add(id, event)
+        return added
+
+    def update_snapshot(self, team, description, count):
+        if description not in self.SNAPSHOTS:
+            return
+        name = self.SNAPSHOTS[description]
+        home, away = getattr(self.snapshot, name)
+        if team == 'home':
+            home = home + count
+        if team == 'away':
+            away = away + count
+        self.snapshot = self.snapshot._replace(**{name: (home, away)})
+
+    def get_snapshot(self):
+        return self.snapshot
+
     def get_count(self, team, description):
-        count = 0
-        for key, value in self.events.items():
-            if value['team'] == team and value['description'] == description:
-                count = count + 1
+        count = self.events.count(team, description)
         return count
 
-    @trace
     def get_coordinates(self, coordinates):
         if not coordinates:
             return None
         # TODO
         return (0.0, 0.0)
 
-    @trace
+    def get_event(self, team, player, seconds, coordinates, description, type, percentage=None):
+        if player:
+            player = intern(player)
+        timestamp = self.get_timestamp()
+        event = Event(team, player, seconds, coordinates, description, type, percentage, timestamp)
+        return event
+
+    def get_capture(self):
+        if not self.capture:
+            path = join(self.CAPTURE, self.get_capture_name())
+            self.capture = open(path, 'a')
+        return self.capture
+
+    def get_capture_name(self):
+        name = '{id:d}.frames'.format(id=self.id)
+        return name
+
+    def get_event_log(self):
+        if not self.event_log:
+            path = join(self.DIRECTORY, '{id:d}.events'.format(id=self.id))
+            self.event_log = EventLog(path)
+        return self.event_log
+
+    def get_handler(self, topic):
+        suffix = self.get_suffix(topic)
+        if suffix not in self.HANDLERS:
+            return None
+        name, spec = self.HANDLERS[suffix]
+        handler = getattr(self, name)
+        handler = partial(handler, suffix, spec)
+        return handler
+
+    def get_items_new(self, suffix, items):
+        previous = set()
+        if suffix in self.items:
+            previous = self.items[suffix]
+        keys = set()
+        new = []
+        for item in items:
+            key = tuple(item)
+            keys.add(key)
+            if key in previous:
+                continue
+            new.append(item)
+        self.items[suffix] = keys
+        return new
+
     def get_headers(self, headers):
         items = []
         for header in headers:
@@ -1184,30 +1013,18 @@ class WebSockets():
         items = self.DELIMITERS_FIELD.join(items)
         return items
 
-    @trace
     def get_id(self, event):
-        items = []
-        for key, value in event.items():
-            if key == '_dispatch_match_event':
-                continue
-            if key == 'percentage':
-                continue
-            if key == 'timestamp':
-                continue
-            items.append((key, value,))
-        items = sorted(items)
-        items = tuple(items)
-        id = hash(items)
+        key = event.get_key()
+        id = blake2b(key, digest_size=8).digest()
+        id = int.from_bytes(id, 'big')
         return id
 
-    @trace
     def get_possession(self, possession):
         home = possession
         home = int(home)
         away = 100 - home
         return home, away
 
-    @trace
     def get_minute(self, minute):
         minute = int(minute)
         minute = (minute * 1.0) / 60.0
@@ -1215,7 +1032,6 @@ class WebSockets():
         minute = int(minute)
         return minute
 
-    @trace
     def get_status_period(self, period):
         if period == 'H1':
             return '1st half'
@@ -1239,21 +1055,359 @@ class WebSockets():
             return '2nd half'
         return 'ended'
 
-    @trace
+    def get_subscription(self, type):
+        if type in self.subscriptions:
+            return self.subscriptions[type]
+        topics = [selector.format(id=self.id) for selector in self.SELECTORS]
+        headers = [self.DELIMITERS_TOPIC.join(topics)]
+        message = type + self.get_headers(headers)
+        message = bytes(message, 'utf-8')
+        self.subscriptions[type] = message
+        return message
+
+    def get_suffix(self, topic):
+        topic = topic.split('/', 3)
+        if len(topic) != 4:
+            return None
+        suffix = '/' + topic[3]
+        return suffix
+
     def get_timestamp(self):
         timestamp = time()
         timestamp = int(timestamp)
         return timestamp
 
-    @trace
-    def get_topic(self, payload):
-        if payload in self.topics:
-            return self.topics[payload]
-        return None
+
+class Multiplexer(WebSockets):
+
+    DELAY = 5.0
+
+    def __init__(self, ids):
+        super().__init__(None)
+        self.sessions = {}
+        self.aliases = {}
+        self.closed = False
+        for id in ids:
+            self.add(id)
+
+    def run(self):
+        while not self.closed:
+            self.open()
+            self.client_id = None
+            self.aliases = {}
+            if self.closed:
+                return
+            sleep(self.DELAY)
+
+    def close(self):
+        self.closed = True
+        for web_sockets in self.sessions.values():
+            web_sockets.close_event_log()
+            web_sockets.close_capture()
+        super().close()
+
+    def add(self, id):
+        if id in self.sessions:
+            return
+        web_sockets = WebSockets(id)
+        self.sessions[id] = web_sockets
+        if self.client_id:
+            self.attach(web_sockets)
+
+    def remove(self, id):
+        if id not in self.sessions:
+            return
+        web_sockets = self.sessions.pop(id)
+        for alias in list(web_sockets.topics):
+            if alias in self.aliases:
+                del self.aliases[alias]
+        if self.client_id:
+            web_sockets.unsubscribe()
+        web_sockets.close_event_log()
+        web_sockets.close_capture()
+
+    def get_capture_name(self):
+        name = 'multiplexer-{pid:d}.frames'.format(pid=getpid())
+        return name
+
+    def attach(self, web_sockets):
+        web_sockets.connection = self.connection
+        web_sockets.client_id = self.client_id
+        web_sockets.subscribe()
+
+    def process_client_id(self, payload):
+        client_id = payload[0][1]
+        self.client_id = client_id
+        self.log('Client ID', self.client_id)
+        for web_sockets in list(self.sessions.values()):
+            self.attach(web_sockets)
+
+    def process_topic_load_message(self, payload):
+        topic = payload[0][0].split('!')
+        alias = topic[1]
+        id = get_match_id(topic[0])
+        if id not in self.sessions:
+            return
+        web_sockets = self.sessions[id]
+        self.aliases[alias] = web_sockets
+        web_sockets.process_topic_load_message(payload)
+
+    def process_delta_message(self, payload):
+        alias = payload[0][0][1:]
+        if alias not in self.aliases:
+            return
+        web_sockets = self.aliases[alias]
+        web_sockets.process_delta_message(payload)
+
+
+class Discard():
+
+    def send(self, message):
+        pass
+
+    def close(self):
+        pass
+
+
+class Server():
+
+    def __init__(self, rate, ping):
+        self.rate = rate
+        self.ping = ping
+        self.count = 0
+
+    async def handle(self, web_socket, path):
+        self.count = self.count + 1
+        client_id = 'C{:d}'.format(self.count)
+        await web_socket.send(get_frame(WebSockets.TYPES_CLIENT_ID, [['100', client_id]]))
+        aliases = {}
+        tasks = {}
+        pinger = ensure_future(self.process_ping(web_socket))
+        try:
+            while True:
+                message = await web_socket.recv()
+                type = message[0]
+                if type == WebSockets.TYPES_SUBSCRIBE:
+                    for id, topics in self.get_topics(message[1:]).items():
+                        if id in tasks:
+                            continue
+                        tasks[id] = ensure_future(self.process_match(web_socket, id, topics, aliases))
+                    continue
+                if type == WebSockets.TYPES_UNSUBSCRIBE:
+                    for id in self.get_topics(message[1:]):
+                        if id in tasks:
+                            tasks.pop(id).cancel()
+                    continue
+        except ConnectionClosed:
+            pass
+        finally:
+            pinger.cancel()
+            for task in tasks.values():
+                task.cancel()
+
+    async def process_match(self, web_socket, id, topics, aliases):
+        random = Random(id)
+        for topic in topics:
+            aliases[topic] = '{:x}'.format(len(aliases))
+            records = [['{:s}!{:s}'.format(topic, aliases[topic])]] + get_records(random, topic, 0)
+            await web_socket.send(get_frame(WebSockets.TYPES_TOPIC_LOAD_MESSAGE, records))
+        start = time()
+        while True:
+            await sleep_async(random.expovariate(self.rate))
+            topic = random.choice(topics)
+            seconds = int(time() - start)
+            records = [['!' + aliases[topic]]] + get_records(random, topic, seconds)
+            await web_socket.send(get_frame(WebSockets.TYPES_DELTA_MESSAGE, records))
+
+    async def process_ping(self, web_socket):
+        while True:
+            await sleep_async(self.ping)
+            timestamp = '{:d}'.format(int(time() * 1000))
+            await web_socket.send(get_frame(WebSockets.TYPES_PING_CLIENT, [[timestamp]]))
+
+    def get_topics(self, payload):
+        topics = {}
+        selectors = payload.split(WebSockets.DELIMITERS_RECORD)[0]
+        for selector in selectors.split(WebSockets.DELIMITERS_TOPIC):
+            id = get_match_id(selector)
+            if id is None:
+                continue
+            if id not in topics:
+                topics[id] = []
+            for topic in WebSockets.TOPICS:
+                topic = topic.format(id=id)
+                if topic == selector or (selector.endswith('//') and topic.startswith(selector[:-1])):
+                    topics[id].append(topic)
+        return topics
+
+
+class Scheduler():
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.sessions = {}
+        self.ended = set()
+
+    def run(self):
+        while True:
+            try:
+                self.update()
+            except Exception as error:
+                LOGGER.log(ERROR, 'Scheduler', error)
+            sleep(self.interval)
+
+    def update(self):
+        for id in list(self.sessions):
+            web_sockets, thread = self.sessions[id]
+            if web_sockets.status['period'] == 'ended':
+                self.stop(id)
+                continue
+            if not thread.is_alive():
+                web_sockets.close_event_log()
+                web_sockets.close_capture()
+                del self.sessions[id]
+        for match in process_matches():
+            if match['id'] in self.sessions:
+                continue
+            if match['id'] in self.ended:
+                continue
+            self.start(match['id'])
+
+    def start(self, id):
+        web_sockets = WebSockets(id)
+        thread = Thread(target=web_sockets.open)
+        thread.daemon = True
+        thread.start()
+        self.sessions[id] = (web_sockets, thread)
+
+    def stop(self, id):
+        web_sockets, thread = self.sessions.pop(id)
+        self.ended.add(id)
+        web_sockets.close()
+
+
+class Supervisor():
+
+    def __init__(self, count, interval, options):
+        self.queues = []
+        self.workers = []
+        for _ in range(count):
+            queue = ProcessQueue()
+            worker = Process(target=execute_worker, args=[queue, options])
+            self.queues.append(queue)
+            self.workers.append(worker)
+        self.interval = interval
+        self.assignments = {}
+
+    def run(self):
+        for worker in self.workers:
+            worker.start()
+        try:
+            while True:
+                ids = self.get_ids()
+                if ids is not None:
+                    self.update(ids)
+                sleep(self.interval)
+        finally:
+            self.stop()
+
+    def get_ids(self):
+        try:
+            ids = [match['id'] for match in process_matches()]
+        except Exception as error:
+            LOGGER.log(ERROR, 'Supervisor', error)
+            return None
+        return ids
+
+    def stop(self):
+        for queue in self.queues:
+            queue.put(None)
+        for worker in self.workers:
+            worker.join()
+
+    def update(self, ids):
+        for id in list(self.assignments):
+            if id not in ids:
+                self.remove(id)
+        for id in ids:
+            if id not in self.assignments:
+                self.add(id, self.get_worker_lightest())
+
+    def add(self, id, index):
+        self.assignments[id] = index
+        self.queues[index].put(('add', id))
+
+    def remove(self, id):
+        index = self.assignments.pop(id)
+        self.queues[index].put(('remove', id))
+
+    def get_loads(self):
+        loads = [[] for _ in self.queues]
+        for id, index in self.assignments.items():
+            loads[index].append(id)
+        return loads
+
+    def get_worker_lightest(self):
+        loads = self.get_loads()
+        index = min(range(len(loads)), key=lambda index: len(loads[index]))
+        return index
+
+
+class Discovery():
+
+    URL = 'http://sports.williamhill.com/bet/en-gb//betlive/9'
+
+    EXTRACTOR = 'full'
+    SYNTHETIC = None
+
+    def __init__(self):
+        self.session = Session()
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        self.etag = None
+        self.last_modified = None
+        self.matches = []
+
+    def get(self):
+        if self.SYNTHETIC:
+            for item in get_items([get_page_synthetic(self.SYNTHETIC)]):
+                yield get_match(item)
+            return
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        response = self.session.request(method='GET', url=self.URL, headers=headers, stream=True)
+        try:
+            if response.status_code == 304:
+                yield from self.matches
+                return
+            response.raise_for_status()
+            if not response.encoding:
+                response.encoding = 'utf-8'
+            matches = []
+            extractor = get_match
+            if self.EXTRACTOR == 'selective':
+                extractor = get_match_selective
+            chunks = response.iter_content(chunk_size=CHUNK_SIZE, decode_unicode=True)
+            for item in get_items(chunks):
+                match = extractor(item)
+                if match:
+                    matches.append(match)
+                    yield match
+            self.matches = matches
+            self.etag = response.headers.get('ETag')
+            self.last_modified = response.headers.get('Last-Modified')
+        finally:
+            response.close()
+
+
+DISCOVERY = Discovery()
 
 
 @trace
 def main(options):
+    configure(options)
     if options[1] == '--matches':
         execute_matches()
         return
@@ -1261,13 +1415,75 @@ def main(options):
         execute_web_sockets(options[2])
         return
     if options[1] == '--threads':
-        execute_threads()
+        execute_threads(get_option(options, '--interval', '60'))
+        return
+    if options[1] == '--multiplex':
+        execute_multiplex()
+        return
+    if options[1] == '--async':
+        execute_async()
+        return
+    if options[1] == '--processes':
+        execute_processes(options[2], get_option(options, '--interval', '60'), options)
+        return
+    if options[1] == '--events':
+        execute_events(options[2], get_option(options, '--team', None), get_option(options, '--description', None))
+        return
+    if options[1] == '--server':
+        execute_server(get_option(options, '--port', '8765'), get_option(options, '--rate', '1'), options)
+        return
+    if options[1] == '--replay':
+        execute_replay(options[2], get_option(options, '--speed', 'fast'))
+        return
+    if options[1] == '--benchmarks':
+        execute_benchmarks(
+            get_option(options, '--frames', None),
+            get_option(options, '--page', None),
+            get_option(options, '--output', None),
+        )
+        return
+    if options[1] == '--benchmark-decode':
+        execute_benchmark_decode(get_option(options, '--frames', None))
+        return
+    if options[1] == '--benchmark-matches':
+        execute_benchmark_matches(get_option(options, '--page', None))
         return
 
 
+def configure(options):
+    if '--trace' in options:
+        trace_all()
+    decoder = get_option(options, '--decoder', None)
+    if decoder:
+        WebSockets.DECODER = decoder
+    level = get_option(options, '--log-level', None)
+    if level:
+        LOGGER.level = LEVELS[level]
+    url = get_option(options, '--url', None)
+    if url:
+        WebSockets.URL = url
+    synthetic = get_option(options, '--synthetic', None)
+    if synthetic:
+        Discovery.SYNTHETIC = int(synthetic)
+    sink = get_option(options, '--sink', None)
+    if sink:
+        WebSockets.SINK = get_sink(sink)
+        register(WebSockets.SINK.close)
+    capture = get_option(options, '--capture', None)
+    if capture:
+        WebSockets.CAPTURE = capture
+    directory = get_option(options, '--events-directory', None)
+    if directory:
+        WebSockets.DIRECTORY = directory
+    extractor = get_option(options, '--extractor', None)
+    if extractor:
+        Discovery.EXTRACTOR = extractor
+
+
 @trace
 def execute_matches():
     matches = process_matches()
+    matches = list(matches)
     pprint(matches)
 
 
@@ -1279,61 +1495,520 @@ def execute_web_sockets(id):
 
 
 @trace
-def execute_threads():
-    threads = []
-    matches = process_matches()
-    for match in matches:
-        thread = Thread(target=execute_web_sockets, args=[match['id']])
-        threads.append(thread)
-    for thread in threads:
-        thread.start()
-    for thread in threads:
-        thread.join()
+def execute_threads(interval):
+    interval = float(interval)
+    scheduler = Scheduler(interval)
+    scheduler.run()
 
 
 @trace
-def process_matches():
-    matches = []
-    url = 'http://sports.williamhill.com/bet/en-gb//betlive/9'
-    response = request(method='GET', url=url)
-    if not response:
-        return matches
-    contents = response.text
-    contents = contents.replace('\n', '')
-    items = PATTERN.findall(contents)
-    for item in items:
-        item = loads(item)
-        id = item['event']
-        id = int(id)
-        teams = {
-            'home': None,
-            'away': None,
-        }
-        for selection in item['selections']:
-            if selection['fb_result'] == 'H':
-                teams['home'] = selection['name']
-            if selection['fb_result'] == 'A':
-                teams['away'] = selection['name']
-        date = get_date(item['start_time'])
-        match = {
-            'id': id,
-            'teams': teams,
-            'date': date,
-        }
-        if match['id'] and match['teams']['home'] and match['teams']['away'] and match['date']:
-            matches.append(match)
-    return matches
+def execute_multiplex():
+    ids = [match['id'] for match in process_matches()]
+    multiplexer = Multiplexer(ids)
+    multiplexer.open()
+
+
+@trace
+def execute_processes(count, interval, options):
+    count = int(count)
+    interval = float(interval)
+    supervisor = Supervisor(count, interval, options)
+    supervisor.run()
+
+
+@trace
+def execute_worker(queue, options):
+    configure(options)
+    multiplexer = Multiplexer([])
+    thread = Thread(target=multiplexer.run)
+    thread.daemon = True
+    thread.start()
+    while True:
+        command = queue.get()
+        if command is None:
+            break
+        action, id = command
+        if action == 'add':
+            multiplexer.add(id)
+            continue
+        if action == 'remove':
+            multiplexer.remove(id)
+            continue
+    multiplexer.close()
+    thread.join()
+
+
+@trace
+def execute_async():
+    loop = new_event_loop()
+    try:
+        loop.run_until_complete(process_async())
+    finally:
+        loop.close()
 
 
 @trace
+def execute_events(path, team, description):
+    event_log_reader = EventLogReader(path)
+    events = event_log_reader.query(team=team, description=description)
+    pprint(events)
+
+
+@trace
+def execute_server(port, rate, options):
+    port = int(port)
+    rate = float(rate)
+    ping = get_option(options, '--ping', '15')
+    ping = float(ping)
+    server = Server(rate, ping)
+    loop = new_event_loop()
+    set_event_loop(loop)
+    try:
+        loop.run_until_complete(serve(server.handle, 'localhost', port))
+        loop.run_forever()
+    finally:
+        loop.close()
+
+
+@trace
+def execute_replay(path, speed):
+    frames = get_frames(path)
+    if not frames:
+        LOGGER.log(ERROR, 'Replay', 'No frames in {:s}'.format(path))
+        return
+    ids = get_ids(frames)
+    if len(ids) == 1:
+        web_sockets = WebSockets(ids[0])
+    else:
+        web_sockets = Multiplexer(ids)
+    web_sockets.connection = Discard()
+    latencies = []
+    start = perf_counter()
+    for timestamp, frame in frames:
+        if speed == 'original':
+            delay = (timestamp - frames[0][0]) - (perf_counter() - start)
+            if delay > 0:
+                sleep(delay)
+        before = perf_counter()
+        web_sockets.on_message(None, frame)
+        latencies.append(perf_counter() - before)
+    seconds = perf_counter() - start
+    frames_per_second = 0.0
+    if seconds:
+        frames_per_second = len(frames) / seconds
+    latencies = sorted(latencies)
+    result = {
+        'frames': len(frames),
+        'seconds': seconds,
+        'frames_per_second': frames_per_second,
+        'latency_p50': get_percentile(latencies, 0.50),
+        'latency_p90': get_percentile(latencies, 0.90),
+        'latency_p99': get_percentile(latencies, 0.99),
+        'latency_max': latencies[-1],
+    }
+    pprint(result)
+
+
+@trace
+def execute_benchmarks(frames, page, output):
+    frames = get_benchmark_frames(frames)
+    contents = get_benchmark_page(page)
+    results = []
+    with open(devnull, 'w') as resource:
+        LOGGER.close()
+        LOGGER.stream = resource
+        results.extend(get_benchmarks_decode(frames))
+        results.extend(get_benchmarks_payloads())
+        results.extend(get_benchmarks_ids())
+        results.extend(get_benchmarks_counts())
+        results.extend(get_benchmarks_matches(contents))
+        results.extend(get_benchmarks_dates())
+        LOGGER.close()
+        LOGGER.stream = stdout
+    report = {
+        'python': python_version(),
+        'json': loads.__module__,
+        'decoder': WebSockets.DECODER,
+        'timestamp': time(),
+        'results': results,
+    }
+    report = dumps(report, indent=2, sort_keys=True)
+    if not output:
+        print(report)
+        return
+    with open(output, 'w') as resource:
+        resource.write(report + '\n')
+
+
+@trace
+def execute_benchmark_decode(path):
+    frames = get_benchmark_frames(path)
+    results = get_benchmarks_decode(frames)
+    pprint(results)
+
+
+@trace
+def execute_benchmark_matches(path):
+    contents = get_benchmark_page(path)
+    results = get_benchmarks_matches(contents)
+    pprint(results)
+
+
+def process_matches():
+    return DISCOVERY.get()
+
+
+def get_items(chunks):
+    contents = ''
+    for chunk in chunks:
+        contents = contents + chunk.replace('\n', '')
+        end = 0
+        for item in PATTERN.finditer(contents):
+            end = item.end()
+            yield item.group(1)
+        start = contents.find(PREFIX, end)
+        if start == -1:
+            start = max(end, len(contents) - len(PREFIX))
+        contents = contents[start:]
+
+
+def get_match(item):
+    item = loads(item)
+    id = item['event']
+    id = int(id)
+    teams = {
+        'home': None,
+        'away': None,
+    }
+    for selection in item['selections']:
+        if selection['fb_result'] == 'H':
+            teams['home'] = selection['name']
+        if selection['fb_result'] == 'A':
+            teams['away'] = selection['name']
+    date = get_date(item['start_time'])
+    match = {
+        'id': id,
+        'teams': teams,
+        'date': date,
+    }
+    if match['id'] and match['teams']['home'] and match['teams']['away'] and match['date']:
+        return match
+    return None
+
+
+def get_match_selective(item):
+    id = PATTERNS['event'].search(item)
+    start_time = PATTERNS['start_time'].search(item)
+    if not id or not start_time:
+        return None
+    id = int(id.group(1))
+    teams = {
+        'home': None,
+        'away': None,
+    }
+    for selection in PATTERNS['selection'].finditer(item):
+        selection = selection.group(0)
+        fb_result = PATTERNS['fb_result'].search(selection)
+        name = PATTERNS['name'].search(selection)
+        if not fb_result or not name:
+            continue
+        if fb_result.group(1) == 'H':
+            teams['home'] = loads(name.group(1))
+        if fb_result.group(1) == 'A':
+            teams['away'] = loads(name.group(1))
+    date = get_date(start_time.group(1))
+    match = {
+        'id': id,
+        'teams': teams,
+        'date': date,
+    }
+    if match['id'] and match['teams']['home'] and match['teams']['away'] and match['date']:
+        return match
+    return None
+
+
+async def process_async():
+    sessions = []
+    for match in process_matches():
+        web_sockets = WebSockets(match['id'])
+        sessions.append(web_sockets.open_async())
+    await gather(*sessions)
+
+
+@lru_cache(maxsize=4096)
 def get_date(date):
-    date = datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
-    bst = timezone('Europe/London')
-    date = bst.localize(date)
+    if len(date) == 19:
+        year, month, day = int(date[0:4]), int(date[5:7]), int(date[8:10])
+        hour, minute, second = int(date[11:13]), int(date[14:16]), int(date[17:19])
+        date = datetime(year, month, day, hour, minute, second)
+    else:
+        date = datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
+    date = TIMEZONE.localize(date)
     date = date.astimezone(utc)
     date = date.replace(tzinfo=None)
     return date
 
 
+def get_sink(sink):
+    type, path = sink.split(':', 1)
+    if type == 'file':
+        return FileSink(path)
+    if type == 'unix':
+        return SocketSink(path)
+    raise ValueError(sink)
+
+
+def get_option(options, name, default):
+    if name not in options:
+        return default
+    index = options.index(name) + 1
+    if index >= len(options):
+        return default
+    return options[index]
+
+
+def get_frames(path):
+    frames = []
+    with open(path) as resource:
+        for line in resource:
+            line = line.strip()
+            if not line:
+                continue
+            timestamp, frame = loads(line)
+            frames.append((timestamp, frame))
+    return frames
+
+
+def get_ids(frames):
+    ids = []
+    for timestamp, frame in frames:
+        if frame[0] != WebSockets.TYPES_TOPIC_LOAD_MESSAGE:
+            continue
+        topic = frame[1:].split(WebSockets.DELIMITERS_RECORD, 1)[0]
+        topic = topic.split('!')[0]
+        id = get_match_id(topic)
+        if id is not None and id not in ids:
+            ids.append(id)
+    return ids
+
+
+def get_percentile(items, percentile):
+    index = percentile * (len(items) - 1)
+    index = int(round(index))
+    return items[index]
+
+
+def get_frames_synthetic(id, count):
+    frames = []
+    random = Random(id)
+    topics = [topic.format(id=id) for topic in WebSockets.TOPICS]
+    frame = get_frame(WebSockets.TYPES_CLIENT_ID, [['100', 'C{:d}'.format(id)]])
+    frames.append((0.0, frame))
+    for alias, topic in enumerate(topics):
+        records = [['{:s}!{:x}'.format(topic, alias)]] + get_records(random, topic, 0)
+        frame = get_frame(WebSockets.TYPES_TOPIC_LOAD_MESSAGE, records)
+        frames.append((0.0, frame))
+    for index in range(count):
+        alias = random.randrange(len(topics))
+        seconds = index
+        records = [['!{:x}'.format(alias)]] + get_records(random, topics[alias], seconds)
+        frame = get_frame(WebSockets.TYPES_DELTA_MESSAGE, records)
+        frames.append((index / 100.0, frame))
+    return frames
+
+
+def get_match_id(topic):
+    topic = topic.split('/', 3)
+    if len(topic) != 4:
+        return None
+    if not topic[2].isdigit():
+        return None
+    id = int(topic[2])
+    return id
+
+
+def get_frame(type, records):
+    records = [WebSockets.DELIMITERS_FIELD.join(record) for record in records]
+    frame = type + WebSockets.DELIMITERS_RECORD.join(records) + WebSockets.DELIMITERS_RECORD
+    return frame
+
+
+def get_records(random, topic, seconds):
+    if topic.endswith('/i18n/en-gb/commentary'):
+        code = random.choice(sorted(WebSockets.COMMENTARIES))
+        coordinates = '{:.2f},{:.2f}'.format(random.random(), random.random())
+        return [[str(seconds), 'en-gb', code.lower(), str(seconds), code, coordinates]]
+    if topic.endswith('/stats/homeTeamPossesion'):
+        return [[str(random.randint(30, 70))]]
+    if topic.endswith('/stats/period'):
+        return [[random.choice(['H1', 'HT', 'H2'])]]
+    if topic.endswith('/stats/time'):
+        return [[str(seconds)]]
+    records = []
+    for index in range(1 + seconds // 60):
+        records.append([str(index), str(index * 60), 'Player {:d}'.format(index)])
+    return records
+
+
+def get_page_synthetic(count):
+    contents = []
+    random = Random(count)
+    contents.append('<html><head><script type="text/javascript">\n')
+    for index in range(count):
+        item = {
+            'event': str(1000000 + index),
+            'name': 'Home {:d} v Away {:d}'.format(index, index),
+            'start_time': '2017-04-{:02d} {:02d}:00:00'.format(random.randint(1, 28), random.randint(0, 23)),
+            'selections': [
+                {'name': 'Home {:d}'.format(index), 'fb_result': 'H', 'lp_num': '1', 'lp_den': '2'},
+                {'name': 'Draw', 'fb_result': 'D', 'lp_num': '5', 'lp_den': '2'},
+                {'name': 'Away {:d}'.format(index), 'fb_result': 'A', 'lp_num': '7', 'lp_den': '1'},
+            ],
+        }
+        contents.append('document.ip_list.create_prebuilt_event({:s});\n'.format(dumps(item)))
+    contents.append('</script></head></html>\n')
+    contents = ''.join(contents)
+    return contents
+
+
+def get_benchmark_frames(path):
+    if path:
+        frames = get_frames(path)
+    else:
+        frames = get_frames_synthetic(1, 10000)
+    return frames
+
+
+def get_benchmark_page(path):
+    if path:
+        with open(path) as resource:
+            contents = resource.read()
+    else:
+        contents = get_page_synthetic(500)
+    return contents
+
+
+def get_benchmarks_decode(frames):
+    results = []
+    payloads = [frame[1:] for timestamp, frame in frames]
+    web_sockets = WebSockets(0)
+    for decoder in sorted(WebSockets.DECODERS):
+        function = getattr(web_sockets, WebSockets.DECODERS[decoder])
+        result = benchmark('decode/' + decoder, function, payloads)
+        results.append(result)
+    return results
+
+
+def get_benchmarks_payloads():
+    results = []
+    random = Random(0)
+    for suffix in sorted(WebSockets.HANDLERS):
+        topic = 'sportsbook/football/1' + suffix
+        name, spec = WebSockets.HANDLERS[suffix]
+        payloads = []
+        for seconds in range(1, 5001):
+            records = get_records(random, topic, seconds)
+            if name == 'process_stats':
+                records = [[str(seconds), str(seconds), 'Player {:d}'.format(seconds)]]
+            payloads.append([['!0']] + records)
+        web_sockets = WebSockets(1)
+        web_sockets.connection = Discard()
+        web_sockets.process_topic_load_message([[topic + '!0']] + get_records(random, topic, 0))
+        result = benchmark('process_delta_message' + suffix, web_sockets.process_delta_message, payloads, repeat=1)
+        results.append(result)
+    return results
+
+
+def get_benchmarks_ids():
+    results = []
+    web_sockets = WebSockets(1)
+    events = get_events_synthetic(10000)
+    result = benchmark('get_id', web_sockets.get_id, events)
+    results.append(result)
+    return results
+
+
+def get_benchmarks_counts():
+    results = []
+    for count in [100, 1000, 10000, 100000]:
+        web_sockets = WebSockets(1)
+        web_sockets.events.CAPACITY = count
+        keys = []
+        for event in get_events_synthetic(count):
+            web_sockets.add_event(event)
+            key = (event.team, event.description)
+            if key not in keys:
+                keys.append(key)
+        web_sockets.flush()
+
+        def get_count(key):
+            web_sockets.get_count(*key)
+
+        result = benchmark('get_count/{:d}'.format(count), get_count, keys * 100)
+        results.append(result)
+    return results
+
+
+def get_benchmarks_matches(contents):
+    results = []
+    items = list(get_items([contents]))
+
+    def get_items_all(contents):
+        list(get_items([contents]))
+
+    results.append(benchmark('matches/items', get_items_all, [contents]))
+    results.append(benchmark('matches/full/' + loads.__module__, get_match, items))
+    results.append(benchmark('matches/selective', get_match_selective, items))
+    return results
+
+
+def get_benchmarks_dates():
+    results = []
+    random = Random(0)
+    dates = []
+    for _ in range(1000):
+        date = '2017-{:02d}-{:02d} {:02d}:{:02d}:00'.format(
+            random.randint(1, 12),
+            random.randint(1, 28),
+            random.randint(0, 23),
+            random.choice([0, 15, 30, 45]),
+        )
+        dates.append(date)
+    get_date.cache_clear()
+    results.append(benchmark('get_date/cold', get_date, dates, repeat=1))
+    results.append(benchmark('get_date/warm', get_date, dates * 10))
+    return results
+
+
+def get_events_synthetic(count):
+    events = []
+    random = Random(count)
+    specs = list(WebSockets.COMMENTARIES.values())
+    for index in range(count):
+        team, description, type, _, _ = random.choice(specs)
+        if isinstance(description, tuple):
+            description = description[0]
+        event = Event(team, None, str(index), (0.0, 0.0), description, type, None, index)
+        events.append(event)
+    return events
+
+
+def benchmark(name, function, items, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for item in items:
+            function(item)
+        timings.append(perf_counter() - start)
+    seconds = min(timings)
+    result = {
+        'name': name,
+        'items': len(items),
+        'seconds': seconds,
+        'items_per_second': len(items) / seconds,
+    }
+    return result
+
+
 if __name__ == '__main__':
     main(argv)